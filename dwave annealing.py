@@ -24,21 +24,21 @@ except:
   IN_COLAB = False
 if IN_COLAB:
   !pip install -q dwave-ocean-sdk==6.10.0
-  !pip install -q bravado==11.0.3
-  !pip install -q pyqubo==1.4.0
   print("All Packages Installed!")
 
 # imports necessary packages to run on a DWAVE Machine
-from pyqubo import Spin, Array, Placeholder, Constraint
 import dimod
 from dwave.system.samplers import DWaveSampler
-from dwave.system.composites import EmbeddingComposite
+from dwave.system.composites import FixedEmbeddingComposite
+import minorminer
+from minorminer.busclique import find_clique_embedding
 import neal
 
 # Misc. imports
 import matplotlib.pyplot as plt
 import networkx as nx
 import numpy as np
+from numba import njit, prange
 import random
 import time
 import os
@@ -46,6 +46,73 @@ import os
 # Connecting to DWAVE Account
 os.environ['DWAVE_API_TOKEN'] = 'ADD YOUR DWAVE API KEY HERE'
 
+# Set to False to solve every example locally with simulated annealing (neal) instead of submitting it to the QPU.
+# For the small instances below this avoids the network round-trip and embedding entirely.
+USE_QPU = True
+
+# Connects to the QPU once, the solver and its working graph are reused by every example below
+if USE_QPU:
+  qpu = DWaveSampler()
+  qpu_graph = qpu.to_networkx_graph()
+
+# Returns the sampler used to solve a BQM. On the QPU this is a fixed minor-embedding: fully connected QUBOs use the
+# clique embedder from busclique, sparse ones use minorminer's heuristic. Embeddings are cached per interaction graph.
+embeddings = {}
+def get_sampler(bqm, clique=False):
+  if not USE_QPU:
+    return neal.SimulatedAnnealingSampler()
+  source_edgelist = list(bqm.quadratic) + [(v, v) for v in bqm.variables]
+  key = frozenset(source_edgelist)
+  if key not in embeddings:
+    if clique:
+      embedding = find_clique_embedding(list(bqm.variables), qpu_graph)
+    else:
+      embedding = minorminer.find_embedding(source_edgelist, qpu.edgelist)
+    # minorminer returns an empty embedding when it fails, which is not cached so a later call can retry
+    if not embedding:
+      raise ValueError("no embedding found for the problem's interaction graph on the QPU")
+    embeddings[key] = embedding
+  return FixedEmbeddingComposite(qpu, embeddings[key])
+
+# Returns the QPU access time of a sampleset in seconds (zero when solved with simulated annealing)
+def qpu_access_time(sampleset):
+  return float(sampleset.info.get('timing', {}).get('qpu_access_time', 0))/1000000
+
+# Samples the BQM in batches until the lowest energy found reaches target_energy or max_reads reads are used up.
+# Without a target energy there is nothing to stop early for, so all reads are submitted at once.
+# Every batch is a separate QPU problem that pays the programming time again, so the batch size doubles after each
+# one: from 50 reads the 1000 read budget is used up in at most 5 submissions instead of 20.
+def adaptive_sample(sampler, bqm, target_energy=None, batch=50, max_reads=1000):
+  if target_energy is None:
+    batch = max_reads
+  samplesets = []
+  total_reads = 0
+  while total_reads < max_reads:
+    num_reads = min(batch, max_reads - total_reads)
+    samplesets.append(sampler.sample(bqm, num_reads=num_reads))
+    total_reads += num_reads
+    batch *= 2
+    if target_energy is not None and samplesets[-1].first.energy <= target_energy + 1e-9:
+      break
+  sampleset = dimod.concatenate(samplesets)
+  # dimod.concatenate drops the info, so it is rebuilt from the batches: the last batch's info is kept, the timing
+  # totals are summed and the per-sample times averaged over the reads, and each batch's info is kept under 'batches'
+  infos = [ss.info for ss in samplesets]
+  sampleset.info.update(infos[-1])
+  timings = [(info['timing'], ss.record.num_occurrences.sum()) for info, ss in zip(infos, samplesets) if 'timing' in info]
+  if timings:
+    timing = dict(timings[-1][0])
+    for key, value in timing.items():
+      if isinstance(value, (int, float)):
+        if key.endswith('_per_sample'):
+          timing[key] = float(sum(t[key]*reads for t, reads in timings)/sum(reads for t, reads in timings))
+        else:
+          timing[key] = sum(t[key] for t, reads in timings)
+    sampleset.info['timing'] = timing
+  sampleset.info['num_reads'] = total_reads
+  sampleset.info['batches'] = infos
+  return sampleset
+
 """### **Example 1 - Number Partitioning Problem**
 
 Initializing an arbitrary number partitioning instance.
@@ -73,17 +140,93 @@ or
 $$Q=(c-2\sum_{i=1}^{n}a_{i}x_{i})^{2}$$
 
 Where $c=\sum_{i=1}^{n}a_{i}$ and $x_{i} \in \{0, 1\}$ is a binary quadratic variable.
-"""
 
-x = Array.create('x', n, 'BINARY')
-H = (c - 2*sum(arr[i]*x[i] for i in range(n)))**2
-model = H.compile()
-bqm = model.to_bqm()
+Expanding the square gives the QUBO matrix directly: $Q_{ii}=4a_{i}(a_{i}-c)$, $Q_{ij}=4a_{i}a_{j}$ for $i \neq j$, with a constant offset of $c^{2}$. The matrix is assembled with NumPy instead of expanding the Hamiltonian symbolically.
+"""
 
-"""Embedding and running the problem on the the DWAVE Quantum Annealer. The best solution is the first one with the lowest energy."""
+# Converts a QUBO matrix into a BQM with variables labelled x[0], x[1], ...
+def qubo_to_bqm(Q, offset=0.0):
+  U = np.triu(Q) + np.tril(Q, -1).T
+  linear = {f'x[{i}]': U[i, i] for i in range(len(U))}
+  quadratic = {(f'x[{i}]', f'x[{j}]'): U[i, j] for i, j in zip(*np.nonzero(np.triu(U, 1)))}
+  return dimod.BinaryQuadraticModel(linear, quadratic, offset, dimod.BINARY)
+
+# Expands (c - 2*sum_i a_i x_i)^2 into a QUBO matrix and its constant offset
+def square_qubo(a, c):
+  a = np.asarray(a)
+  Q = 4*np.outer(a, a)
+  np.fill_diagonal(Q, Q.diagonal() - 4*c*a)
+  return Q, c**2
+
+# Converts a sample with x[i] labels back into a NumPy array of the binary variables, ordered by i
+def sample_to_array(sample, n):
+  bits = np.empty(n, dtype=np.int8)
+  for key, value in sample.items():
+    bits[int(key[2:-1])] = value
+  return bits
+
+# Enumerates all 2^n bitstrings of a QUBO in Gray-code order, so each step flips one bit and updates the energy in O(n).
+# The enumeration is split into chunks that run in parallel, each keeping only its best state.
+@njit(parallel=True)
+def qubo_ground_state(Q):
+  n = Q.shape[0]
+  S = Q + Q.T
+  chunk_bits = min(n, 10)
+  n_chunks = 1 << chunk_bits
+  chunk_size = 1 << (n - chunk_bits)
+  best_energies = np.empty(n_chunks)
+  best_states = np.empty(n_chunks, dtype=np.int64)
+  for chunk in prange(n_chunks):
+    k0 = chunk*chunk_size
+    state = k0 ^ (k0 >> 1)
+    x = np.zeros(n)
+    for i in range(n):
+      x[i] = (state >> i) & 1
+    # field[i] is the coupling of bit i to all the other set bits
+    field = np.zeros(n)
+    energy = 0.0
+    for i in range(n):
+      for j in range(n):
+        if j != i:
+          field[i] += S[i, j]*x[j]
+      energy += x[i]*(Q[i, i] + 0.5*field[i])
+    best_energy, best_state = energy, state
+    for k in range(k0 + 1, k0 + chunk_size):
+      b = 0
+      while not (k >> b) & 1:
+        b += 1
+      step = 1.0 - 2.0*x[b]
+      energy += step*(Q[b, b] + field[b])
+      x[b] += step
+      for j in range(n):
+        if j != b:
+          field[j] += step*S[j, b]
+      state ^= 1 << b
+      if energy < best_energy:
+        best_energy, best_state = energy, state
+    best_energies[chunk] = best_energy
+    best_states[chunk] = best_state
+  return best_states[np.argmin(best_energies)]
+
+# Finds the ground state of a QUBO matrix by brute force
+def exact_solve(Q):
+  state = qubo_ground_state(np.asarray(Q, dtype=np.float64))
+  return ((state >> np.arange(len(Q))) & 1).astype(np.int8)
+
+Q, offset = square_qubo(arr, c)
+bqm = qubo_to_bqm(Q, offset)
+
+"""For instances with up to $28$ variables the ground state can also be found classically by enumerating every bitstring. The enumeration is JIT-compiled with Numba and visits the bitstrings in Gray-code order, so each step flips a single bit and only updates the energy instead of recomputing it, and no $2^{n}$-sized array is ever allocated. This is fast enough to run alongside the solver and gives a reference to check the annealer's solution against."""
+
+if n <= 28:
+  print("Exact Solution: " + str(exact_solve(Q)))
+
+"""Embedding and running the problem on the the DWAVE Quantum Annealer. The number partitioning QUBO is fully connected, so it is embedded as a clique. The best solution is the first one with the lowest energy.
+
+Rather than always taking $1000$ reads, the problem is sampled in batches, starting at $50$ reads and doubling each time, until a perfect partition is found. Since $(c-2\sum_{i=1}^{n}a_{i}x_{i})^{2}$ is the square of a number with the same parity as $c$, no solution can have an energy below $c \bmod 2$.
+"""
 
-sampler = EmbeddingComposite(DWaveSampler())
-sampleset = sampler.sample(bqm, num_reads=1000)
+sampleset = adaptive_sample(get_sampler(bqm, clique=True), bqm, target_energy=c % 2)
 sample = sampleset.first
 
 print(sample)
@@ -91,41 +234,30 @@ print(sample)
 """Print sampler solving details."""
 
 print(sampleset.info)
-elapsed_time = float(sampleset.info['timing']['qpu_access_time'])/1000000
+elapsed_time = qpu_access_time(sampleset)
 
 # Converting the output binary variables to produce a valid output
-def NPP_measure(sortedSample):
-  P1 = []
-  P2 = []
-  for i in sortedSample.keys():
-    if sortedSample[i] == 0:
-        P1.append(arr[int(i[2:len(i)-1])])
-    else:
-        P2.append(arr[int(i[2:len(i)-1])])
-  sum1 = sum(P1[i] for i in range(len(P1)))
-  sum2 = sum(P2[i] for i in range(len(P2)))
-  print(P1)
-  print('Sum: ' + str(sum1))
-  print(P2)
-  print('Sum: ' + str(sum2))
-  return abs(sum2-sum1)
-
-#Sorts samples by numbers to see which quadratic variables are 0 and 1
-sampleKeys = list(sample.sample.keys())
-def sortbynumber(str):
-    return int(str[2:len(str)-1])
-sampleKeys.sort(key = sortbynumber)
-sortedSample = {i: sample.sample[i] for i in sampleKeys}
-#print(sortedSample)
+def NPP_measure(bits):
+  mask = bits.astype(bool)
+  P1 = np.asarray(arr)[~mask]
+  P2 = np.asarray(arr)[mask]
+  print(P1.tolist())
+  print('Sum: ' + str(P1.sum()))
+  print(P2.tolist())
+  print('Sum: ' + str(P2.sum()))
+  return abs(P2.sum() - P1.sum())
+
+# Orders the sampled binary variables by index to see which are 0 and 1
+bits = sample_to_array(sample.sample, n)
+#print(bits)
 print("QPU Access Time: " + str(elapsed_time))
-NPP_measure(sortedSample)
+NPP_measure(bits)
 
 """### **Example 2 - Max-Cut Problem**"""
 
 def draw_graph(G, colors, pos):
     default_axes = plt.axes()
     nx.draw_networkx(G, node_color=colors, node_size=600, alpha=0.8, ax=default_axes, pos=pos)
-    edge_labels = nx.get_edge_attributes(G, "weight")
 
 """Initializing an arbitrary Max-Cut instance."""
 
@@ -136,6 +268,9 @@ G = nx.Graph()
 G.add_nodes_from(np.arange(0, n, 1))
 edges = [(0, 1, 1.0), (0, 3, 1.0), (1, 2, 1.0), (2, 3, 1.0), (2, 4, 1.0), (3, 4, 1.0)]
 G.add_weighted_edges_from(edges)
+# edge endpoints as index arrays, for evaluating solutions
+u_arr = np.fromiter((e[0] for e in edges), dtype=np.int32)
+v_arr = np.fromiter((e[1] for e in edges), dtype=np.int32)
 
 colors = ["r" for node in G.nodes()]
 pos = nx.spring_layout(G)
@@ -157,46 +292,42 @@ $$Q=\sum_{(i, j)\in E}(x_{i}+x_{j}-2x_{i}x_{j})$$
 Where $x_{i} \in \{0, 1\}$ is a binary quadratic variable.
 """
 
-x = Array.create('x', n, 'BINARY')
-H = sum(2*x[e[0]]*x[e[1]] - x[e[0]] - x[e[1]] for e in edges)
-model = H.compile()
-bqm = model.to_bqm()
+Q = np.zeros((n, n))
+for i, j, w in edges:
+  Q[i, i] -= w
+  Q[j, j] -= w
+  Q[i, j] += 2*w
+bqm = qubo_to_bqm(Q)
+
+# brute-force reference solution to compare the sampled one against, sampling stops early once its energy is reached
+target_energy = None
+if n <= 28:
+  exact = exact_solve(Q)
+  target_energy = bqm.energy({f'x[{i}]': v for i, v in enumerate(exact)})
+  print("Exact Solution: " + str(exact))
 
 """Embedding and running the problem on the the DWAVE Quantum Annealer."""
 
-sampler = EmbeddingComposite(DWaveSampler())
-sampleset = sampler.sample(bqm, num_reads=1000)
+sampleset = adaptive_sample(get_sampler(bqm), bqm, target_energy)
 sample = sampleset.first
 
 """Print sampler solving details."""
 
 print(sampleset.info)
-elapsed_time = float(sampleset.info['timing']['qpu_access_time'])/1000000
+elapsed_time = qpu_access_time(sampleset)
 
-#Sorts samples by numbers to see which quadratic variables are 0 and 1
-sampleKeys = list(sample.sample.keys())
-sampleKeys.sort(key = sortbynumber)
-sortedSample = {i: sample.sample[i] for i in sampleKeys}
-print(sortedSample)
+# Orders the sampled binary variables by index to see which are 0 and 1
+bits = sample_to_array(sample.sample, n)
+print(bits)
 
 # Converting the output binary variables to produce a valid output
-def MaxCut(sortedSample):
-  maxcut_sol = []
-  for i in sortedSample.keys():
-    if sortedSample[i] == 0:
-        maxcut_sol.append(0)
-    else:
-        maxcut_sol.append(1)
+def MaxCut(maxcut_sol):
   colors = ["r" if maxcut_sol[i] == 0 else "c" for i in range(len(maxcut_sol))]
   draw_graph(G, colors, pos)
-  cutsize = 0
-  for u, v in G.edges():
-    if maxcut_sol[u] != maxcut_sol[v]:
-      cutsize += 1
-  return cutsize
+  return int(np.bitwise_xor(maxcut_sol[u_arr], maxcut_sol[v_arr]).sum())
 
 print("QPU Access Time: " + str(elapsed_time))
-print(MaxCut(sortedSample))
+print(MaxCut(bits))
 
 """### **Example 3 - Minimum Vertex Cover**
 
@@ -210,6 +341,9 @@ G = nx.Graph()
 G.add_nodes_from(np.arange(0, n, 1))
 edges = [(0, 1, 1.0), (0, 2, 1.0), (1, 2, 1.0), (1, 3, 1.0), (1, 4, 1.0), (1, 5, 1.0)]
 G.add_weighted_edges_from(edges)
+# edge endpoints as index arrays, for evaluating solutions
+u_arr = np.fromiter((e[0] for e in edges), dtype=np.int32)
+v_arr = np.fromiter((e[1] for e in edges), dtype=np.int32)
 
 colors = ["r" for node in G.nodes()]
 pos = nx.spring_layout(G)
@@ -233,47 +367,43 @@ Where $x_{i} \in \{0, 1\}$ is a binary quadratic variable.
 Note in the example $P$ was chosen through trial-and-error although there exists rigorous mathematical processes
 """
 
-x = Array.create('x', n, 'BINARY')
 P = 0.5
-H = sum(x[i] for i in range(n)) + P*sum(1 - x[e[0]] - x[e[1]] + x[e[0]]*x[e[1]] for e in edges)
-model = H.compile()
-bqm = model.to_bqm()
+Q = np.eye(n)
+for i, j, w in edges:
+  Q[i, i] -= P
+  Q[j, j] -= P
+  Q[i, j] += P
+bqm = qubo_to_bqm(Q, offset=P*len(edges))
+
+# brute-force reference solution to compare the sampled one against, sampling stops early once its energy is reached
+target_energy = None
+if n <= 28:
+  exact = exact_solve(Q)
+  target_energy = bqm.energy({f'x[{i}]': v for i, v in enumerate(exact)})
+  print("Exact Solution: " + str(exact))
 
 """Embedding and solving the problem on a DWAVE Quantum Annealer."""
 
-sampler = EmbeddingComposite(DWaveSampler())
-sampleset = sampler.sample(bqm, num_reads=1000)
+sampleset = adaptive_sample(get_sampler(bqm), bqm, target_energy)
 sample = sampleset.first
 
 """Print sampler solving details."""
 
 print(sampleset.info)
-elapsed_time = float(sampleset.info['timing']['qpu_access_time'])/1000000
+elapsed_time = qpu_access_time(sampleset)
 
-#Sorts samples by numbers to see which quadratic variables are 0 and 1
-sampleKeys = list(sample.sample.keys())
-sampleKeys.sort(key = sortbynumber)
-sortedSample = {i: sample.sample[i] for i in sampleKeys}
-print(sortedSample)
+# Orders the sampled binary variables by index to see which are 0 and 1
+bits = sample_to_array(sample.sample, n)
+print(bits)
 
 # Converting the output binary variables to produce a valid output
-def MVC(sortedSample):
-  mvc_sol = []
-  for i in sortedSample.keys():
-    if sortedSample[i] == 0:
-        mvc_sol.append(0)
-    else:
-        mvc_sol.append(1)
+def MVC(mvc_sol):
   colors = ["r" if mvc_sol[i] == 0 else "c" for i in range(len(mvc_sol))]
   draw_graph(G, colors, pos)
-  covered = 0
-  for u, v in G.edges():
-    if mvc_sol[u] == 1 or mvc_sol[v] == 1:
-      covered += 1
-  return covered
+  return int(np.bitwise_or(mvc_sol[u_arr], mvc_sol[v_arr]).sum())
 
 print("QPU Access Time: " + str(elapsed_time))
-print(MVC(sortedSample))
+print(MVC(bits))
 
 """### **Example 4 - Cancer Genomics**
 
@@ -281,80 +411,85 @@ Identifying Cancer Gene Pathways from the TCGA-AML Data. The techniques used wer
 """
 
 # import necessary package for data imports
-from bravado.client import SwaggerClient
-from itertools import combinations
+import requests
 
-# connects to cbioportal to access data
-cbioportal = SwaggerClient.from_url('https://www.cbioportal.org/api/v2/api-docs',
-                                    config={"validate_requests":False,"validate_responses":False,"validate_swagger_spec":False})
+# connects to cbioportal's REST API to access data, responses are used as plain JSON
+CBIOPORTAL_API = 'https://www.cbioportal.org/api'
+cbioportal = requests.Session()
+cbioportal.headers.update({'Accept': 'application/json'})
 
 """Accessing AML study data from the cbioportal."""
 
 # accesses cbioportal's AML study data
-aml = cbioportal.Cancer_Types.getCancerTypeUsingGET(cancerTypeId='aml').result()
+aml = cbioportal.get(f'{CBIOPORTAL_API}/cancer-types/aml').json()
 
 # access the patient data of AML study
-patients = cbioportal.Patients.getAllPatientsInStudyUsingGET(studyId='laml_tcga').result()
-
-# for each mutation, creates a list of properties associated with the mutation include geneID, patientID, and more
-InitialMutations = cbioportal.Mutations.getMutationsInMolecularProfileBySampleListIdUsingGET(
-    molecularProfileId='laml_tcga_mutations',
-    sampleListId='laml_tcga_all',
-    projection='DETAILED'
-).result()
+patients = cbioportal.get(f'{CBIOPORTAL_API}/studies/laml_tcga/patients').json()
+
+# for each mutation, fetches only its identifying properties, including the entrez gene ID and patient ID
+# the samples of the study are split into 8 disjoint groups whose mutations are requested over several threads so that
+# the HTTP round trips overlap, every mutation belongs to exactly one sample so the groups never return the same mutation
+from concurrent.futures import ThreadPoolExecutor
+import threading
+NUM_GROUPS = 8
+response = cbioportal.get(f'{CBIOPORTAL_API}/sample-lists/laml_tcga_all/sample-ids')
+response.raise_for_status()
+sample_ids = response.json()
+sample_groups = [sample_ids[i::NUM_GROUPS] for i in range(NUM_GROUPS) if sample_ids[i::NUM_GROUPS]]
+
+# requests does not guarantee a Session is thread-safe, so each thread of the pool gets its own
+thread_data = threading.local()
+def fetch_sample_mutations(sample_group):
+    if not hasattr(thread_data, 'session'):
+        thread_data.session = requests.Session()
+        thread_data.session.headers.update(cbioportal.headers)
+    response = thread_data.session.post(f'{CBIOPORTAL_API}/molecular-profiles/laml_tcga_mutations/mutations/fetch',
+                                        params={'projection': 'ID'}, json={'sampleIds': sample_group})
+    response.raise_for_status()
+    return response.json()
+
+with ThreadPoolExecutor(NUM_GROUPS) as executor:
+    InitialMutations = [m for group in executor.map(fetch_sample_mutations, sample_groups) for m in group]
 
 """Identifying the $33$ most common genes from the study.
 
 Then preprocessing the data to create a Patient-Gene Dictionary to construct the matrices from.
 """
 
-# tests if data is correct
-# Compares the frequency of the 33 most common genes and compares them with the information listed on
-# https://www.cbioportal.org/study/summary?id=laml_tcga
+# counts the mutations of each gene and collects the mutated genes of each patient in a single pass
 from collections import Counter
-mutation_counts = Counter([m.gene.hugoGeneSymbol for m in InitialMutations])
-MostImportantMutationsCounts = mutation_counts.most_common(33)
-MostImportantMutations = []
-for i in range(len(MostImportantMutationsCounts)):
-    MostImportantMutations.append(MostImportantMutationsCounts[i][0])
-
-# Sort the patients by index
-def sortPatients(m):
-    return m.patientId
-
-mutations = []
+mutation_counts = Counter()
+PatientGeneIds = {}
 for m in InitialMutations:
-    if m.gene.hugoGeneSymbol in MostImportantMutations:
-        mutations.append(m)
-geneset = set()
-
-for m in mutations:
-    geneset.add(m.gene.hugoGeneSymbol)
-# creates a patient-(gene-list) dictionary
+    mutation_counts[m['entrezGeneId']] += 1
+    PatientGeneIds.setdefault(m['patientId'], set()).add(m['entrezGeneId'])
 
+# tests if data is correct
+# Compares the frequency of the 33 most common genes and compares them with the information listed on
+# https://www.cbioportal.org/study/summary?id=laml_tcga
+# genes with equal counts are ordered by gene ID, so the cut at 33 does not depend on the order the mutations arrived in
+MostImportantGeneIds = [gene_id for gene_id, count in sorted(mutation_counts.items(), key=lambda kv: (-kv[1], kv[0]))[:33]]
+
+# the ID projection has no gene symbols, so the symbols of the most common genes are looked up in a single request
+response = cbioportal.post(f'{CBIOPORTAL_API}/genes/fetch', params={'geneIdType': 'ENTREZ_GENE_ID'},
+                           json=[str(gene_id) for gene_id in MostImportantGeneIds])
+response.raise_for_status()
+gene_symbols = {gene['entrezGeneId']: gene['hugoGeneSymbol'] for gene in response.json()}
+missing_ids = set(MostImportantGeneIds) - set(gene_symbols)
+if missing_ids:
+    raise ValueError(f"cbioportal returned no gene symbol for entrez gene IDs {sorted(missing_ids)}")
+
+# creates a patient-(gene-list) dictionary of the most common genes, sorted by patient
+MostImportantGeneIdSet = set(MostImportantGeneIds)
 PatientGeneDict = {}
-mutations.sort(key = sortPatients)
-
-for m in mutations:
-    if m.patientId in PatientGeneDict.keys(): # if the patient is already in dictionary add the gene to their previous gene list
-        PatientGeneDict[m.patientId].append(m.gene.hugoGeneSymbol)
-    else:
-        PatientGeneDict[m.patientId] = [m.gene.hugoGeneSymbol] # else add the patient their associated gene
+for patient in sorted(PatientGeneIds):
+    genes = [gene_symbols[gene_id] for gene_id in PatientGeneIds[patient] if gene_id in MostImportantGeneIdSet]
+    if genes:
+        PatientGeneDict[patient] = genes
 
 # create independent patient and gene lists
-patientset = set()
-for m in mutations:
-    patientset.add(m.patientId)
-patientList = [] # patient list
-for m in patientset:
-    patientList.append(m)
-geneList = [] # gene list
-for gene in geneset:
-    geneList.append(gene)
-geneList.sort()
-
-for key in PatientGeneDict:
-    PatientGeneDict[key] = list(set(PatientGeneDict[key]))
+patientList = list(PatientGeneDict) # patient list
+geneList = sorted({gene for genes in PatientGeneDict.values() for gene in genes}) # gene list
 
 """Patient-Gene Dictionary that displays each patient and their corresponding gene-list."""
 
@@ -364,70 +499,45 @@ for k in PatientGeneDict.keys():
     print(k)
     print(PatientGeneDict[k])
 
-"""Create the diagonal $\mathbf{D}$ matrix to represent gene-coverage."""
-
-import numpy as np
-D = np.zeros((n, n))
-for i in range(n):
-    count = 0
-    for k in PatientGeneDict.keys():
-        if geneList[i] in PatientGeneDict[k]:
-            count += 1
-        D[i][i] = count
-
-"""Generate gene pairs to create the $\mathbf{A}$ exclusivity matrix"""
+"""Create the patient-gene matrix $\mathbf{M}$, where $M_{pg}=1$ if patient $p$ has a mutation in gene $g$. Both the $\mathbf{D}$ and $\mathbf{A}$ matrices are computed from it.
 
-def generate_pairs(lst):
-    pairs = set()
-    for subset in combinations(lst, 2):
-        pairs.add(tuple(sorted(subset)))
-    return pairs
+Create the diagonal $\mathbf{D}$ matrix to represent gene-coverage.
+"""
 
-"""Using the patient-gene dictionary, we identify all gene-pairs for each patient. This used to create the $\mathbf{A}$ matrix."""
+import numpy as np
+n = len(geneList) # number of genes
+gene_to_idx = {gene: i for i, gene in enumerate(geneList)}
+M = np.zeros((len(patientList), n))
+for p_idx, p in enumerate(patientList):
+    for gene in PatientGeneDict[p]:
+        M[p_idx, gene_to_idx[gene]] = 1
 
-# creates a patient-(gene-list-pair) dictionary
-PatientGeneDictPairs = {}
-for m in mutations:
-        PatientGeneDictPairs[m.patientId] = generate_pairs(PatientGeneDict[m.patientId])
+# coverage of each gene is the number of patients with a mutation in it
+D = np.diag(M.sum(axis=0))
 
-"""With all the preprocessing done, the $\mathbf{A}$ matrix is completed.
+"""With all the preprocessing done, the $\mathbf{A}$ matrix is completed. Since $(\mathbf{M}^{T}\mathbf{M})_{ij}$ counts the patients with mutations in both gene $i$ and gene $j$, the gene pairs of each patient never need to be generated.
 
 """
 
-# creates the A exclusivity matrix
-A = np.zeros((n, n))
-for j in range(n):
-    if i != j:
-        count = 0
-        for k in PatientGeneDict.keys():
-            if (geneList[i], geneList[j]) in PatientGeneDictPairs[k]:
-                count += 1
-        A[i][j] = count
-        A[j][i] = count
+# creates the A exclusivity matrix, A[i][j] is the number of patients with mutations in both gene i and gene j
+A = M.T @ M
+np.fill_diagonal(A, 0)
 
 """Identify properties from the gene pathway:"""
 
-# returns the coverage of a gene
-def gene_coverage(gene):
-    return D[geneList.index(gene)][geneList.index(gene)]
+# returns the matrix indices of the genes in a pathway
+def pathway_indices(pathway):
+    return np.array([gene_to_idx[gene] for gene in pathway], dtype=int)
 
 # returns the coverage of a pathway
 def coverage(pathway):
-    coverage_val = 0
-    for i in pathway:
-        coverage_val += gene_coverage(i)
-    return coverage_val
+    return D.diagonal()[pathway_indices(pathway)].sum()
 
 # returns the indepence(exclusivity) of a pathway
 def indep(pathway):
-    num_overlap = 0
-    for i in pathway:
-        for j in pathway:
-            if i == j:
-                pass
-            else:
-                num_overlap += A[geneList.index(i)][geneList.index(j)]
-    return num_overlap
+    idx = pathway_indices(pathway)
+    # the diagonal of A is zero, so only pairs of distinct genes contribute
+    return A[np.ix_(idx, idx)].sum()
 
 """Using the $\mathbf{A}$ and $\mathbf{D}$ matrices, we create the QUBO to identify the Cancer Genes. As stated in "Quantum and Quantum-inspired Methods for de novo
 Discovery of Altered Cancer Pathways", the QUBO formulation to identify the cancer gene set while balancing Indepence and Coverage is:
@@ -437,38 +547,23 @@ $$\mathbf{Q}=\mathbf{x}^{T}(\mathbf{A}-\alpha \mathbf{D})\mathbf{x}$$
 Where $\mathbf{D}$ and $\mathbf{A}$ are the previously found matrices and $\mathbf{x}$ is the vector of binary variables $x_{i}$
 """
 
-# initializes an array of QUBO variables
-x = Array.create('x', n, 'BINARY')
-H1 = sum(sum(A[i][j]*x[i]*x[j] for j in range(n)) for i in range(n))
-H2 = sum(D[i][i]*x[i] for i in range(n))
-a = Placeholder("alpha")
-H = H1 - a*H2
-
-# creates a Hamiltonian to run on DWAVE sampler
-model = H.compile()
-feed_dict = {'alpha': 0.45}
-bqm = model.to_bqm(feed_dict=feed_dict)
-
-# Getting Results from Sampler
-sampler = EmbeddingComposite(DWaveSampler())
-sampleset = sampler.sample(bqm, num_reads=1000)
+# creates the QUBO matrix to run on DWAVE sampler
+alpha = 0.45
+Q = A - alpha*D
+bqm = qubo_to_bqm(Q)
+
+# Getting Results from Sampler, there is no reference energy to stop early for with 33 genes
+sampleset = adaptive_sample(get_sampler(bqm), bqm)
 sample = sampleset.first
 
 """Print sampler solving details."""
 
 print(sampleset.info)
-sampleKeys = list(sample.sample.keys())
-def sortbynumber(str):
-    return int(str[2:len(str)-1])
-sampleKeys.sort(key = sortbynumber)
-sortedSample = {i: sample.sample[i] for i in sampleKeys}
+bits = sample_to_array(sample.sample, n)
 
 """Print the identified pathway"""
 
-pathway = []
-for i in sampleKeys:
-    if sortedSample[i] == 1:
-        pathway.append(geneList[int(i[2:len(i)-1])])
+pathway = [geneList[i] for i in np.flatnonzero(bits)]
 print(pathway)
 print("coverage: " + str(coverage(pathway)))
 print("coverage/gene: " + str(round(coverage(pathway)/len(pathway), 2)))
@@ -496,74 +591,50 @@ T = sum(stock_vals)
 n = 6 # number of stocks
 m = 3 # number of risk factors
 
-"""We create the Order Partitioning QUBO."""
-
-x = Array.create('x', n, 'BINARY')
-H1 = (T - 2*sum(stock_vals[j]*x[j] for j in range(n)))**2
-H2 = sum(sum(risk_factor_matrix[i][j]*(2*x[j]-1)**2 for j in range(n)) for i in range(m))
+"""We create the Order Partitioning QUBO. Both terms are squares of the same form as the number partitioning QUBO: the cost term has $c=T$ and $a_{j}=q_{j}$, and since $\sum_{j=1}^{n}p_{ij}(2x_{j}-1)=2\sum_{j=1}^{n}p_{ij}x_{j}-R_{i}$ with $R_{i}=\sum_{j=1}^{n}p_{ij}$, each risk term has $c=R_{i}$ and $a_{j}=p_{ij}$."""
 
-# Construct hamiltonian
-a = Placeholder("a")
-b = Placeholder("b")
-H = a*H1 + b*H2
-model = H.compile()
+# cost balance term
+Q1, offset1 = square_qubo(stock_vals, T)
 
-# Generate QUBO
-feed_dict = {'a': 2, 'b': 2}
-bqm = model.to_bqm(feed_dict=feed_dict)
+# risk balance terms, one per risk factor
+Q2, offset2 = np.zeros((n, n)), 0.0
+for risks in np.array(risk_factor_matrix):
+  Q_i, offset_i = square_qubo(risks, risks.sum())
+  Q2 += Q_i
+  offset2 += offset_i
 
-# Construct hamiltonian
-a = Placeholder("a")
-b = Placeholder("b")
-H = a*H1 + b*H2
-model = H.compile()
+# Generate QUBO, the terms are kept separate so trying other weights a and b only needs them recombined
+a, b = 2, 2
+Q = a*Q1 + b*Q2
+bqm = qubo_to_bqm(Q, a*offset1 + b*offset2)
 
-# Generate QUBO
-feed_dict = {'a': 2, 'b': 2}
-bqm = model.to_bqm(feed_dict=feed_dict)
+# brute-force reference solution to compare the sampled one against, sampling stops early once its energy is reached
+target_energy = None
+if n <= 28:
+  exact = exact_solve(Q)
+  target_energy = bqm.energy({f'x[{i}]': v for i, v in enumerate(exact)})
+  print("Exact Solution: " + str(exact))
 
 """We solve the QUBO using the Quantum Annealing Sampler."""
 
-sampler = EmbeddingComposite(DWaveSampler())
-sampleset = sampler.sample(bqm, num_reads=1000)
+sampleset = adaptive_sample(get_sampler(bqm, clique=True), bqm, target_energy)
 sample = sampleset.first # gets lowest energy sample
 
 """We display the solving details and solution."""
 
-#Sorts samples by numbers to see which quadratic variables are 0 and 1
-sampleKeys = list(sample.sample.keys())
-def sortbynumber(str):
-    return int(str[2:len(str)-1])
-sampleKeys.sort(key = sortbynumber)
-sortedSample = {i: sample.sample[i] for i in sampleKeys}
-print(sortedSample)
+# Orders the sampled binary variables by index to see which are 0 and 1
+bits = sample_to_array(sample.sample, n)
+print(bits)
 print(sampleset.info)
 
-# Converting the output binary variables to produce a valid output
-Set_A = []
-net_cost_A = 0
-net_risk_1A = 0
-net_risk_2A = 0
-net_risk_3A = 0
-Set_B = []
-net_cost_B = 0
-net_risk_1B = 0
-net_risk_2B = 0
-net_risk_3B = 0
-keylist = list(sortedSample.keys())
-for i in range(0, len(keylist)):
-  if(sortedSample[keylist[i]] == 0):
-    Set_A.append(Stocks[i])
-    net_cost_A += stock_vals[i]
-    net_risk_1A += risk_factor_matrix[0][i]
-    net_risk_2A += risk_factor_matrix[1][i]
-    net_risk_3A += risk_factor_matrix[2][i]
-  else:
-    Set_B.append(Stocks[i])
-    net_cost_B += stock_vals[i]
-    net_risk_1B += risk_factor_matrix[0][i]
-    net_risk_2B += risk_factor_matrix[1][i]
-    net_risk_3B += risk_factor_matrix[2][i]
+# Converting the output binary variables to produce a valid output, stocks with x_j = 0 go to Set A and the rest to Set B
+in_A = bits == 0
+Set_A = np.array(Stocks)[in_A].tolist()
+Set_B = np.array(Stocks)[~in_A].tolist()
+net_cost_A = np.array(stock_vals)[in_A].sum()
+net_cost_B = np.array(stock_vals)[~in_A].sum()
+net_risk_A = np.array(risk_factor_matrix)[:, in_A].sum(axis=1) # net risk of each risk factor
+net_risk_B = np.array(risk_factor_matrix)[:, ~in_A].sum(axis=1)
 print("Stock Partition: ", Set_A, Set_B)
 print("Difference of Net Cost between Partition: ", net_cost_A-net_cost_B)
-print("Difference of Net Risk between Partition: ", round((net_risk_1A+net_risk_2A+net_risk_3A)-(net_risk_1B+net_risk_2B+net_risk_3B),2))
\ No newline at end of file
+print("Difference of Net Risk between Partition: ", round(net_risk_A.sum()-net_risk_B.sum(),2))
\ No newline at end of file
@@ -49,18 +49,16 @@ from numpy import pi
 import networkx as nx
 import numpy as np
 import matplotlib.pyplot as plt
-from docplex.mp.model import Model
 from scipy.optimize import minimize
 from collections import defaultdict, Counter
+from itertools import combinations
 
 # Qiskit Imports
 from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister, transpile, assemble
 from qiskit_aer import Aer
 from qiskit_ibm_runtime import QiskitRuntimeService, SamplerV2 as Sampler
-from qiskit_optimization.converters import QuadraticProgramToQubo
 from qiskit_optimization import QuadraticProgram
 from qiskit.visualization import plot_histogram, circuit_drawer
-from qiskit_optimization.translators import from_docplex_mp
 
 """### **Introduction - Custom Circuit Construction**
  Regardless of the problem addressed, the vanilla QAOA implementation requires a Cost Hamiltonian, Mixer Hamiltonian, and QAOA Circuit. Thus will implement this once below to reuse across many problems.
@@ -137,16 +135,15 @@ or
 $$Q=(c-2\sum_{i=1}^{n}a_{i}x_{i})^{2}$$
 
 Where $c=\sum_{i=1}^{n}a_{i}$ and $x_{i} \in \{0, 1\}$ is a binary quadratic variable.
-"""
 
-model = Model()
-x = model.binary_var_list(n)
-H = (c - 2*sum(arr[i]*x[i] for i in range(n)))**2
-model.minimize(H)
-problem = from_docplex_mp(model)
+Expanding the square by hand gives the QUBO coefficients $Q_{ii}=4a_{i}(a_{i}-c)$ and $Q_{ij}=8a_{i}a_{j}$ for $i<j$, with a constant offset of $c^{2}$. These are loaded into the Quadratic Program directly instead of expanding the square symbolically.
+"""
 
-converter = QuadraticProgramToQubo()
-qubo = converter.convert(problem)
+qubo = QuadraticProgram()
+qubo.binary_var_list(n)
+qubo.minimize(constant=c**2,
+              linear={i: 4*arr[i]*(arr[i] - c) for i in range(n)},
+              quadratic={(i, j): 8*arr[i]*arr[j] for i, j in combinations(range(n), 2)})
 
 quadratics = qubo.objective.quadratic.coefficients
 linears = qubo.objective.linear.coefficients
@@ -276,7 +273,6 @@ NPP_Sets(sorted_solutions[0], print)
 def draw_graph(G, colors, pos):
     default_axes = plt.axes()
     nx.draw_networkx(G, node_color=colors, node_size=600, alpha=0.8, ax=default_axes, pos=pos)
-    edge_labels = nx.get_edge_attributes(G, "weight")
 
 """Initializing a Max-Cut Instance."""
 
@@ -288,6 +284,10 @@ G.add_nodes_from(np.arange(0, n, 1))
 edges = [(0, 1, 1.0), (0, 3, 1.0), (1, 2, 1.0), (2, 3, 1.0), (2, 4, 1.0), (3, 4, 1.0)]
 G.add_weighted_edges_from(edges)
 
+# edge endpoints as index arrays, for evaluating bitstrings
+u_arr = np.fromiter((e[0] for e in edges), dtype=np.int32)
+v_arr = np.fromiter((e[1] for e in edges), dtype=np.int32)
+
 colors = ["r" for node in G.nodes()]
 pos = nx.spring_layout(G)
 
@@ -306,16 +306,14 @@ The corresponding QUBO Model is:
 $$Q=\sum_{(i, j)\in E}(x_{i}+x_{j}-2x_{i}x_{j})$$
 
 Where $x_{i} \in \{0, 1\}$ is a binary quadratic variable.
-"""
 
-model = Model()
-x = model.binary_var_list(n)
-H = sum(2*x[e[0]]*x[e[1]] - x[e[0]] - x[e[1]] for e in edges)
-model.minimize(H)
-problem = from_docplex_mp(model)
+Collecting terms, each vertex $i$ gets the linear coefficient $-\deg(i)$ and each edge the quadratic coefficient $2$, so the Quadratic Program is built straight from the graph.
+"""
 
-converter = QuadraticProgramToQubo()
-qubo = converter.convert(problem)
+qubo = QuadraticProgram()
+qubo.binary_var_list(n)
+qubo.minimize(linear={i: -deg for i, deg in G.degree()},
+              quadratic={(u, v): 2 for u, v, w in edges})
 print(qubo)
 
 quadratics = qubo.objective.quadratic.coefficients
@@ -326,11 +324,8 @@ num_qubits = qubo.get_num_vars()
 """Defining the Max-Cut objective function that will be using the calculate the expected value of each bitstring."""
 
 def maxcut_obj(str):
-  cut_size = 0
-  for u, v in G.edges():
-      if str[u] != str[v]:
-          cut_size -= 1
-  return cut_size
+  bits = np.frombuffer(str.encode(), dtype=np.uint8) - ord("0")
+  return -int(np.bitwise_xor(bits[u_arr], bits[v_arr]).sum())
 
 """Calculating the expected value of a Max Cut QAOA Circuit."""
 
@@ -450,17 +445,16 @@ $$Q=\sum_{i \in V}x_{i} + P(\sum_{(i, j) \in E}(1-x_{i}-x_{j}+x_{i}x_{j}))$$
 Where $x_{i} \in \{0, 1\}$ is a binary quadratic variable.
 
 Note in the example $P$ was chosen through trial-and-error although there exists rigorous mathematical processes
+
+Collecting terms, each vertex $i$ gets the linear coefficient $1-P\deg(i)$, each edge the quadratic coefficient $P$ and the constant is $P|E|$, so the Quadratic Program is built straight from the graph.
 """
 
-model = Model()
-x = model.binary_var_list(n)
 P = 0.5
-H = sum(x[i] for i in range(n)) + P*sum(1 - x[e[0]] - x[e[1]] + x[e[0]]*x[e[1]] for e in edges)
-model.minimize(H)
-problem = from_docplex_mp(model)
-
-converter = QuadraticProgramToQubo()
-qubo = converter.convert(problem)
+qubo = QuadraticProgram()
+qubo.binary_var_list(n)
+qubo.minimize(constant=P*len(edges),
+              linear={i: 1 - P*deg for i, deg in G.degree()},
+              quadratic={(u, v): P for u, v, w in edges})
 print(qubo)
 
 quadratics = qubo.objective.quadratic.coefficients
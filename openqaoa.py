@@ -39,6 +39,7 @@ from qiskit_optimization.converters import QuadraticProgramToQubo
 
 # Misc. Imports
 import time
+from itertools import combinations
 import numpy as np
 import networkx as nx
 import matplotlib.pyplot as plt
@@ -81,11 +82,14 @@ or
 $$Q=(c-2\sum_{i=1}^{n}a_{i}x_{i})^{2}$$
 
 Where $c=\sum_{i=1}^{n}a_{i}$ and $x_{i} \in \{0, 1\}$ is a binary quadratic variable.
+
+Expanding the square by hand gives the QUBO coefficients $Q_{ii}=4a_{i}(a_{i}-c)$ and $Q_{ij}=8a_{i}a_{j}$ for $i<j$, with a constant offset of $c^{2}$. The docplex model is written with these coefficients, so docplex does not need to expand the square itself.
 """
 
 model = Model()
 x = model.binary_var_list(n)
-H = (c - 2*sum(arr[i]*x[i] for i in range(n)))**2
+H = c**2 + model.sum(4*arr[i]*(arr[i] - c)*x[i] for i in range(n)) \
+    + model.sum(8*arr[i]*arr[j]*x[i]*x[j] for i, j in combinations(range(n), 2))
 model.minimize(H)
 
 """The QUBO Model is then converted to an Ising model to solve using QAOA."""
@@ -176,10 +180,13 @@ Using OpenQAOA MaxCut feature to generate a random graph. This graph is converte
 def draw_graph(G, colors, pos):
     default_axes = plt.axes()
     nx.draw_networkx(G, node_color=colors, node_size=600, alpha=0.8, ax=default_axes, pos=pos)
-    edge_labels = nx.get_edge_attributes(G, "weight")
 
 G = nx.generators.fast_gnp_random_graph(n=6, p=0.5)
 n = 6
+
+# edge endpoints as index arrays, for evaluating bitstrings
+u_arr = np.fromiter((u for u, v in G.edges()), dtype=np.int32)
+v_arr = np.fromiter((v for u, v in G.edges()), dtype=np.int32)
 colors = ["r" for node in G.nodes()]
 pos = nx.spring_layout(G)
 draw_graph(G, colors, pos)
@@ -258,10 +265,8 @@ q.result.plot_cost()
 
 # Converting the output binary variables to produce a valid output
 def MaxCut_measure(solution, print=None):
-  cut_size = 0
-  for u, v in G.edges():
-      if solution[u] != solution[v]:
-          cut_size -= 1
+  bits = np.frombuffer(solution.encode(), dtype=np.uint8) - ord("0")
+  cut_size = -int(np.bitwise_xor(bits[u_arr], bits[v_arr]).sum())
   colors = ["r" if solution[i] == "0" else "c" for i in range(len(solution))]
   if print:
     draw_graph(G, colors, pos)
@@ -38,22 +38,25 @@ except:
 if IN_COLAB:
  !pip install -q qiskit==0.39.2
  !pip install -q qiskit-optimization==0.5.0
+ !pip install -q cvxpy==1.3.4
  print("All Packages Installed!")
 
 # Problem Modelling Imports
-from qiskit_optimization.converters.quadratic_program_to_qubo import QuadraticProgramToQubo
-from qiskit_optimization.translators import from_docplex_mp
-from docplex.mp.model import Model
+from qiskit_optimization import QuadraticProgram
 
 # Qiskit Optimizer Imports
 from qiskit_optimization.algorithms import MinimumEigenOptimizer
 from qiskit.algorithms.minimum_eigensolvers import QAOA
 from qiskit.algorithms.optimizers import SPSA, COBYLA, NELDER_MEAD
 
-from qiskit.primitives import Sampler
+from qiskit_aer.primitives import Sampler as AerSampler
+from qiskit import QuantumCircuit
+from qiskit.circuit import Parameter
 
 # Misc. Imports
 import time
+import numpy as np
+from numba import njit, prange
 import matplotlib.pyplot as plt
 
 """### **Example 1 - Number Partitioning Problem**"""
@@ -81,27 +84,87 @@ or
 $$Q=(c-2\sum_{i=1}^{n}a_{i}x_{i})^{2}$$
 
 Where $c=\sum_{i=1}^{n}a_{i}$ and $x_{i} \in \{0, 1\}$ is a binary quadratic variable.
+
+Expanding the square gives the QUBO matrix directly: $Q_{ii}=4a_{i}(a_{i}-c)$, $Q_{ij}=4a_{i}a_{j}$ for $i \neq j$, with a constant offset of $c^{2}$. The matrix is assembled with NumPy and loaded straight into a Quadratic Program, skipping the symbolic docplex expansion.
 """
 
-model = Model()
-x = model.binary_var_list(n)
-Q = (c - 2*sum(arr[i]*x[i] for i in range(n)))**2
-model.minimize(Q)
-problem = from_docplex_mp(model)
-qubo = QuadraticProgramToQubo().convert(problem)
+# Builds a Quadratic Program over binary variables x0, x1, ... from a QUBO matrix
+def qubo_to_problem(Q, offset=0.0):
+    problem = QuadraticProgram()
+    problem.binary_var_list(len(Q))
+    problem.minimize(constant=offset, linear=np.diag(Q), quadratic=np.triu(Q, 1) + np.tril(Q, -1).T)
+    return problem
+
+# Enumerates all 2^n bitstrings of a QUBO in Gray-code order, so each step flips one bit and updates the energy in O(n).
+# The enumeration is split into chunks that run in parallel, each keeping only its best state.
+@njit(parallel=True)
+def qubo_ground_state(Q):
+    n = Q.shape[0]
+    S = Q + Q.T
+    chunk_bits = min(n, 10)
+    n_chunks = 1 << chunk_bits
+    chunk_size = 1 << (n - chunk_bits)
+    best_energies = np.empty(n_chunks)
+    best_states = np.empty(n_chunks, dtype=np.int64)
+    for chunk in prange(n_chunks):
+        k0 = chunk*chunk_size
+        state = k0 ^ (k0 >> 1)
+        x = np.zeros(n)
+        for i in range(n):
+            x[i] = (state >> i) & 1
+        # field[i] is the coupling of bit i to all the other set bits
+        field = np.zeros(n)
+        energy = 0.0
+        for i in range(n):
+            for j in range(n):
+                if j != i:
+                    field[i] += S[i, j]*x[j]
+            energy += x[i]*(Q[i, i] + 0.5*field[i])
+        best_energy, best_state = energy, state
+        for k in range(k0 + 1, k0 + chunk_size):
+            b = 0
+            while not (k >> b) & 1:
+                b += 1
+            step = 1.0 - 2.0*x[b]
+            energy += step*(Q[b, b] + field[b])
+            x[b] += step
+            for j in range(n):
+                if j != b:
+                    field[j] += step*S[j, b]
+            state ^= 1 << b
+            if energy < best_energy:
+                best_energy, best_state = energy, state
+        best_energies[chunk] = best_energy
+        best_states[chunk] = best_state
+    return best_states[np.argmin(best_energies)]
+
+# Finds the ground state of a QUBO matrix by brute force
+def exact_solve(Q):
+    state = qubo_ground_state(np.asarray(Q, dtype=np.float64))
+    return ((state >> np.arange(len(Q))) & 1).astype(np.int8)
+
+a = np.array(arr)
+Q = 4*np.outer(a, a)
+np.fill_diagonal(Q, Q.diagonal() - 4*c*a)
+problem = qubo_to_problem(Q, offset=c**2)
+
+"""For instances with up to $28$ variables the ground state can also be found classically by enumerating every bitstring. The enumeration is JIT-compiled with Numba and visits the bitstrings in Gray-code order, so each step flips a single bit and only updates the energy instead of recomputing it, and no $2^{n}$-sized array is ever allocated. This is fast enough to run alongside the solver and gives a reference to check the QAOA solution against."""
+
+if n <= 28:
+    print("Exact Solution: " + str(exact_solve(Q)))
 
 """**Solving the QUBO**
 
-This algorithm uses the Simultaneous Perturbation Stochastic Approximation (SPSA) optimizers. It is one of the gradient-free optimization algorithms offered by Qiskit-Optimization and is well suited uncertain or noisy objective functions. In this SPSA is run for a maximum of 250 iterations
+This algorithm uses the Simultaneous Perturbation Stochastic Approximation (SPSA) optimizers. It is one of the gradient-free optimization algorithms offered by Qiskit-Optimization and is well suited uncertain or noisy objective functions. In this SPSA is run for a maximum of 60 iterations, with blocking and a trust region so that steps which increase the objective are rejected. The p=2 circuits here converge well within that budget
 
-The sampler reference the base sampler used by Qiskit. This sampler finds the probability of bitstring solutions. Finally the QAOA uses the optimizer and sampler to create the quantum circuit to run on the QASM Simulator. You can further specify the number of reps which describes the number of iterations of cost and mixer hamiltonians. In this example and all following circuits, this has been set to $p=2$.
+The sampler finds the probability of bitstring solutions. It is the Qiskit Aer sampler run with the statevector method and without shots, so the bitstring probabilities are computed exactly rather than estimated from a shot-based simulation, which is much faster for the small circuits in these examples. The same sampler is reused by all the following examples. Finally the QAOA uses the optimizer and sampler to create the quantum circuit to run on the Aer Simulator. You can further specify the number of reps which describes the number of iterations of cost and mixer hamiltonians. In this example and all following circuits, this has been set to $p=2$, except for the warm-started Max-Cut circuit which uses $p=1$.
 
 The Minimum Eigen Optimizer converts the QUBO problems to Ising Model and then solves it using the quantum circuit defined before.
 
 """
 
-spsa = SPSA(maxiter=250)
-sampler = Sampler()
+spsa = SPSA(maxiter=60, blocking=True, trust_region=True)
+sampler = AerSampler(backend_options={"method": "statevector"}, run_options={"shots": None})
 qaoa = QAOA(sampler=sampler, optimizer=spsa, reps=2)
 algorithm = MinimumEigenOptimizer(qaoa)
 
@@ -110,36 +173,29 @@ result = algorithm.solve(problem)
 elapsed_time = result.min_eigen_solver_result.optimizer_time
 
 # Converting the output binary variables to produce a valid output
-def partition(binary_dict):
-    P1 = []
-    P2 = []
-    for key, value in binary_dict.items():
-        if value == 0:
-            P1.append(arr[int(key[1:])])
-        elif value == 1:
-            P2.append(arr[int(key[1:])])
-    sum1 = sum(P1)
-    sum2 = sum(P2)
+def partition(bits):
+    mask = np.asarray(bits).astype(bool)
+    P1 = np.asarray(arr)[~mask]
+    P2 = np.asarray(arr)[mask]
+    sum1 = P1.sum()
+    sum2 = P2.sum()
     if print is not None:
-      print(P1)
+      print(P1.tolist())
       print('Sum: ' + str(sum1))
-      print(P2)
+      print(P2.tolist())
       print('Sum: ' + str(sum2))
     return abs(sum1 - sum2)
 
-partition(result.variables_dict)
+partition(result.x)
 print("Optimization Time: " + str(elapsed_time))
 
 """### **Example 2 - Max-Cut Problem**"""
 
-import numpy as np
 import networkx as nx
-import matplotlib.pyplot as plt
 
 def draw_graph(G, colors, pos):
     default_axes = plt.axes()
     nx.draw_networkx(G, node_color=colors, node_size=600, alpha=0.8, ax=default_axes, pos=pos)
-    edge_labels = nx.get_edge_attributes(G, "weight")
 
 # Generating a graph of 4 nodes
 
@@ -170,21 +226,60 @@ $$Q=\sum_{(i, j)\in E}(x_{i}+x_{j}-2x_{i}x_{j})$$
 Where $x_{i} \in \{0, 1\}$ is a binary quadratic variable.
 """
 
-model = Model()
-x = model.binary_var_list(n)
-H = sum(2*x[e[0]]*x[e[1]] - x[e[0]] - x[e[1]] for e in edges)
-model.minimize(H)
-problem = from_docplex_mp(model)
-qubo = QuadraticProgramToQubo().convert(problem)
+Q = np.zeros((n, n))
+for i, j, w in edges:
+    Q[i, i] -= w
+    Q[j, j] -= w
+    Q[i, j] += 2*w
+problem = qubo_to_problem(Q)
+
+# brute-force reference solution to compare the QAOA one against
+if n <= 28:
+    print("Exact Solution: " + str(exact_solve(Q)))
+
+"""**Warm-Starting the QAOA**
+
+Instead of starting from the uniform superposition, the QAOA is warm-started (WS-QAOA) from a classical solution of the Max-Cut. The Goemans-Williamson SDP relaxation is solved with cvxpy and rounded with random hyperplanes, giving a cut $x^{*}$. Each qubit is then prepared in $R_{Y}(\theta_{i})|0\rangle$ with $\theta_{i}=2\arcsin(\sqrt{c_{i}})$, where $c_{i}=\epsilon$ if $x^{*}_{i}=0$ and $c_{i}=1-\epsilon$ otherwise. The regularization $\epsilon=0.25$ lets the QAOA move away from the classical cut. The mixer is replaced by $R_{Y}(\theta_{i})R_{Z}(-2\beta)R_{Y}(-\theta_{i})$, which has the warm-start state as its ground state. Starting this close to the optimum, $p=1$ is expected to reach a solution quality comparable to the $p=2$ circuits at half the circuit depth; the exact solution printed above can be used to check this.
+"""
+
+import cvxpy as cp
+
+# Solves the Goemans-Williamson SDP relaxation of the Max-Cut and returns the best of the random hyperplane roundings
+def goemans_williamson(n, edges, trials=100, seed=0):
+    X = cp.Variable((n, n), symmetric=True)
+    cut = sum(w*(1 - X[i, j])/2 for i, j, w in edges)
+    cp.Problem(cp.Maximize(cut), [X >> 0, cp.diag(X) == 1]).solve()
+    eigvals, eigvecs = np.linalg.eigh(X.value)
+    V = eigvecs*np.sqrt(np.clip(eigvals, 0, None))
+    cuts = (V @ np.random.default_rng(seed).standard_normal((n, trials)) > 0).astype(int).T
+    cut_sizes = [sum(w for i, j, w in edges if x[i] != x[j]) for x in cuts]
+    return cuts[np.argmax(cut_sizes)]
+
+# Builds the warm-start initial state and mixer circuits from a classical solution
+def warm_start_circuits(solution, epsilon=0.25):
+    c_vals = np.where(solution == 1, 1 - epsilon, epsilon)
+    thetas = 2*np.arcsin(np.sqrt(c_vals))
+    initial_state = QuantumCircuit(len(thetas))
+    mixer = QuantumCircuit(len(thetas))
+    beta = Parameter("beta")
+    for i, theta in enumerate(thetas):
+        initial_state.ry(theta, i)
+        mixer.ry(-theta, i)
+        mixer.rz(-2*beta, i)
+        mixer.ry(theta, i)
+    return initial_state, mixer
+
+ws_solution = goemans_williamson(n, edges)
+print("Goemans-Williamson Cut: " + str(ws_solution))
+initial_state, mixer = warm_start_circuits(ws_solution)
 
 """**Solving the QUBO**
 
-Other than the features shared with Number Partitioning Partition, this algorithm uses the Constrained by Linear Approximation (COBYLA) optimizers. It is another gradient-free optimization algorithms offered by Qiskit-Optimization. It is similarly run for 250 iterations and is one of the most popularly used QAOA optimizers due to its tradeoff of speed and accuracy.
+Other than the features shared with Number Partitioning Partition, this algorithm uses the Constrained by Linear Approximation (COBYLA) optimizers. It is another gradient-free optimization algorithms offered by Qiskit-Optimization. It is run for at most 250 iterations but stops early once the trust region shrinks below a tolerance of $10^{-3}$ (SciPy's default is $10^{-4}$), and is one of the most popularly used QAOA optimizers due to its tradeoff of speed and accuracy.
 """
 
-cobyla = COBYLA(maxiter=250)
-sampler = Sampler()
-qaoa = QAOA(sampler=sampler, optimizer=cobyla, reps=2)
+cobyla = COBYLA(maxiter=250, tol=1e-3)
+qaoa = QAOA(sampler=sampler, optimizer=cobyla, reps=1, initial_state=initial_state, mixer=mixer)
 algorithm = MinimumEigenOptimizer(qaoa)
 
 result = algorithm.solve(problem)
@@ -230,21 +325,24 @@ Where $x_{i} \in \{0, 1\}$ is a binary quadratic variable.
 Note in the example $P$ was chosen through trial-and-error although there exists rigorous mathematical processes
 """
 
-model = Model()
-x = model.binary_var_list(n)
 P = 10
-H = sum(x[i] for i in range(n)) + P*sum(1 - x[e[0]] - x[e[1]] + x[e[0]]*x[e[1]] for e in edges)
-model.minimize(H)
-problem = from_docplex_mp(model)
-qubo = QuadraticProgramToQubo().convert(problem)
+Q = np.eye(n)
+for i, j, w in edges:
+    Q[i, i] -= P
+    Q[j, j] -= P
+    Q[i, j] += P
+problem = qubo_to_problem(Q, offset=P*len(edges))
+
+# brute-force reference solution to compare the QAOA one against
+if n <= 28:
+    print("Exact Solution: " + str(exact_solve(Q)))
 
 """**Solving the QUBO**
 
-Other than the features shared with Number Partitioning Partition, this algorithm uses the Nelder optimizers. It is another gradient-free optimization algorithms offered by Qiskit-Optimization. It is great for solving nondifferentiable, nonlinear, and noisy functions by iterative evolving a simplex and is similarly run for 250 iterations.
+Other than the features shared with Number Partitioning Partition, this algorithm uses the Nelder optimizers. It is another gradient-free optimization algorithms offered by Qiskit-Optimization. It is great for solving nondifferentiable, nonlinear, and noisy functions by iterative evolving a simplex and is similarly run for at most 250 iterations, stopping early once the simplex and its objective values change by less than $10^{-3}$.
 """
 
-nelder_mead = NELDER_MEAD(maxiter=250)
-sampler = Sampler()
+nelder_mead = NELDER_MEAD(maxiter=250, xatol=1e-3, tol=1e-3)
 qaoa = QAOA(sampler=sampler, optimizer=nelder_mead, reps=2)
 algorithm = MinimumEigenOptimizer(qaoa)
 